@@ -7,7 +7,8 @@
 # Each item's content is separated by a decorative comment block.
 #
 # How to Use:
-# 1. Place this script (`combine.py`) in the root directory of your project.
+# 1. Place this script (`combine.py`) and its helper module (`combine_core.py`)
+#    in the root directory of your project.
 # 2. Run the script. A window will appear with a list and configuration options.
 # 3. Check the "Ignored Directories" list. If your code is in a folder that is
 #    listed (e.g., 'dist', 'build'), remove it from the text box.
@@ -16,11 +17,30 @@
 # 6. Click the "Combine Selected Items..." button.
 #
 
+import atexit
+import codecs
+import collections
+import math
+import multiprocessing
 import os
+import shelve
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import traceback
 import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    import chardet  # Optional: used to guess legacy encodings of non-UTF-8 files
+except ImportError:
+    chardet = None
+
+from combine_core import (
+    bom_encoding, build_separator_template, compile_ignore_pattern, file_ext, format_separator,
+    is_binary_prefix, walk_entries,
+)
 
 # --- Configuration ---
 
@@ -52,7 +72,7 @@ COMMENT_MAP = {
     '.txt': '#',
 }
 
-# File extensions to include (empty list means include all files)
+# Default file extensions to include (empty list means include all files)
 INCLUDE_EXTENSIONS = [
     '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.c', '.h', '.cpp', '.hpp',
     '.cs', '.go', '.swift', '.kt', '.rs', '.scala', '.rb', '.sh', '.pl',
@@ -71,123 +91,475 @@ BINARY_EXTENSIONS = {
     '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2'
 }
 
+# Size of the chunks streamed from each source file into the output file
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Write buffer for the output file, so that many small files cost few write() calls
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Number of leading bytes sampled to classify a file and detect its encoding
+SAMPLE_SIZE = 1 << 15
+
+# Number of threads used to probe and read files concurrently
+IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Number of file reads allowed in flight ahead of the output writer
+READ_AHEAD = 64
+
+# Files up to this size are read ahead in full; larger ones are streamed
+PREFETCH_MAX_BYTES = 1 << 20
+
+# Fewest non-UTF-8 files worth starting worker processes for to guess their encodings.
+# Spawning a worker takes about 0.2 s and chardet about 6 ms per sample, so even two
+# workers only break even at around 70 files
+LEGACY_POOL_MIN_FILES = 96
+
+# Samples handed to an encoding worker at a time
+LEGACY_POOL_CHUNK_SIZE = 8
+
+# On-disk cache of file classifications, reused across runs
+CLASSIFY_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'combine_py', 'classify.db')
+
+# Entries the classification cache may grow to before it is compacted on open
+CLASSIFY_CACHE_MAX_ENTRIES = 50_000
+
+# Kinds of items shown in the selection list, and the label prefix for each
+ITEM_DIR = 'dir'
+ITEM_FILE = 'file'
+ITEM_LABELS = {ITEM_DIR: " [DIR] ", ITEM_FILE: " [FILE] "}
+
 # --- Core Logic Functions ---
 
-def is_binary_file(file_path):
-    """Check if a file is likely to be binary."""
-    _, ext = os.path.splitext(file_path.lower())
-    if ext in BINARY_EXTENSIONS:
+# Shelf backing CLASSIFY_CACHE_PATH: None until opened, False if it could not be opened
+_classify_store = None
+_classify_store_lock = threading.Lock()
+
+# (ext, is_binary, encoding) per path for the current scan or combine; see _classify
+_classify_cache = {}
+
+_SEPARATOR_TEMPLATES = {ext: build_separator_template(style) for ext, style in COMMENT_MAP.items()}
+_DEFAULT_SEPARATOR = build_separator_template('#')
+
+def _is_utf8(prefix):
+    """Checks whether a sample decodes as UTF-8."""
+    try:
+        # Incremental decode so a multi-byte character cut off at the end of
+        # the sample is not mistaken for invalid UTF-8.
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
         return True
-    
+    except UnicodeDecodeError:
+        return False
+
+def guess_legacy_encoding(prefix):
+    """Guesses the encoding of a sample that is not UTF-8, falling back to latin-1."""
+    if chardet is not None:
+        guess = chardet.detect(prefix)
+        if guess['encoding'] and guess['confidence'] > 0.7:
+            try:
+                return codecs.lookup(guess['encoding']).name
+            except LookupError:
+                pass
+    # latin-1 maps every byte, so the content always decodes
+    return 'latin-1'
+
+def detect_encoding(prefix):
+    """Guesses the encoding of a file from the first bytes of its content."""
+    encoding = bom_encoding(prefix)
+    if encoding:
+        return encoding
+    if _is_utf8(prefix):
+        return 'utf-8'
+    return guess_legacy_encoding(prefix)
+
+def _probe(file_path):
+    """Reads a file's leading sample once and returns (is_binary, encoding, prefix), or None if unreadable.
+
+    `encoding` is None for a text file that is not UTF-8; guess_legacy_encoding(prefix) then decides it.
+    """
     try:
         with open(file_path, 'rb') as f:
-            chunk = f.read(1024)
-            if b'\x00' in chunk:  # Null byte indicates binary
-                return True
+            prefix = f.read(SAMPLE_SIZE)
     except Exception:
-        return True
+        return None
     
-    return False
+    # UTF-16/32 text is full of null bytes, but a BOM marks it as text
+    encoding = bom_encoding(prefix)
+    if encoding:
+        return False, encoding, prefix
+    if is_binary_prefix(prefix):
+        return True, None, prefix
+    return False, 'utf-8' if _is_utf8(prefix) else None, prefix
+
+def _compact_classify_store(store):
+    """Rewrites an oversized shelf with only its most recently classified, existing files.
+
+    Returns the reopened shelf. The rewrite also reclaims the space dbm.dumb never reuses.
+    """
+    entries = []
+    for key in list(store.keys()):
+        try:
+            value = store[key]
+        except Exception:
+            continue  # Unreadable entries are simply dropped
+        if os.path.exists(key):
+            # Entries written before timestamps were stored sort as oldest
+            stored_at = value[4] if len(value) > 4 else 0
+            entries.append((stored_at, key, value))
+    entries.sort(key=lambda entry: entry[0], reverse=True)
+    store.close()
+
+    # Keep headroom below the cap so the next compaction is not right around the corner
+    store = shelve.open(CLASSIFY_CACHE_PATH, flag='n')
+    for _, key, value in entries[:CLASSIFY_CACHE_MAX_ENTRIES * 3 // 4]:
+        store[key] = value
+    return store
+
+def _open_classify_store():
+    """Opens the on-disk classification cache once; returns None if it is unavailable.
+
+    The shelf is not locked, so when two instances run at once the last one to exit
+    wins and the other's new entries are lost; they are only recomputed next time.
+    """
+    global _classify_store
+    with _classify_store_lock:
+        if _classify_store is None:
+            try:
+                os.makedirs(os.path.dirname(CLASSIFY_CACHE_PATH), exist_ok=True)
+                store = shelve.open(CLASSIFY_CACHE_PATH)
+                if len(store) > CLASSIFY_CACHE_MAX_ENTRIES:
+                    store = _compact_classify_store(store)
+                _classify_store = store
+                atexit.register(_classify_store.close)
+            except Exception as e:
+                print(f"Classification cache disabled: {e}")
+                _classify_store = False
+    return _classify_store if _classify_store is not False else None
+
+def _store_stamp(file_path):
+    """Returns the (key, mtime_ns, size) identifying a file in the on-disk cache, or None."""
+    if _open_classify_store() is None:
+        return None
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return os.path.abspath(file_path), st.st_mtime_ns, st.st_size
+
+def _store_get(stamp):
+    """Returns the cached (is_binary, encoding) for a stamp while the file is unchanged, else None."""
+    if stamp is None:
+        return None
+    key, mtime_ns, size = stamp
+    try:
+        with _classify_store_lock:
+            cached = _classify_store.get(key)
+    except Exception as e:
+        print(f"Error reading classification cache for {key}: {e}")
+        return None
+    if cached is not None and cached[:2] == (mtime_ns, size):
+        return cached[2:4]
+    return None
+
+def _store_put(stamp, is_binary, encoding):
+    """Records a classification in the on-disk cache."""
+    if stamp is None:
+        return
+    key, mtime_ns, size = stamp
+    try:
+        # One entry per path, so edited files replace their stale result; the time
+        # stored last lets _compact_classify_store keep the most recent entries
+        with _classify_store_lock:
+            _classify_store[key] = (mtime_ns, size, is_binary, encoding, time.time())
+    except Exception as e:
+        print(f"Error updating classification cache for {key}: {e}")
 
-def should_include_file(file_path):
-    """Check if a file should be included based on extension and other criteria."""
-    if not os.path.isfile(file_path):
-        return False
+def _start_classify(file_path):
+    """Does the I/O-bound part of classifying a file.
+
+    Returns (result, pending). `result` is the (ext, is_binary, encoding) triple, or None
+    if the file is text that is not UTF-8; `pending` then holds the (stamp, prefix) that
+    _finish_classify needs once guess_legacy_encoding has run on the prefix.
+    """
+    ext = file_ext(file_path)
+    if ext in BINARY_EXTENSIONS:
+        return (ext, True, None), None
     
-    # Check if it's a binary file
-    if is_binary_file(file_path):
-        return False
+    # Reuse the result of an earlier run while the file's mtime and size match
+    stamp = _store_stamp(file_path)
+    cached = _store_get(stamp)
+    if cached is not None:
+        return (ext, *cached), None
     
-    # If INCLUDE_EXTENSIONS is empty, include all non-binary files
-    if not INCLUDE_EXTENSIONS:
-        return True
+    probed = _probe(file_path)
+    if probed is None:
+        # Excluded like a binary file, but not stored: the failure may be
+        # transient (EMFILE) or fixed later without touching mtime (chmod)
+        return (ext, True, None), None
+    is_binary, encoding, prefix = probed
+    if not is_binary and encoding is None:
+        return None, (stamp, prefix)
+    _store_put(stamp, is_binary, encoding)
+    return (ext, is_binary, encoding), None
+
+def _finish_classify(file_path, pending, encoding):
+    """Completes a classification left pending by _start_classify with the guessed encoding."""
+    stamp, _ = pending
+    _store_put(stamp, False, encoding)
+    return file_ext(file_path), False, encoding
+
+def _classify(file_path):
+    """Returns (ext, is_binary, encoding) for a file, probing its content at most once."""
+    result = _classify_cache.get(file_path)
+    if result is None:
+        result, pending = _start_classify(file_path)
+        if result is None:
+            result = _finish_classify(file_path, pending, guess_legacy_encoding(pending[1]))
+        _classify_cache[file_path] = result
+    return result
+
+def _guess_legacy_encodings(prefixes):
+    """Runs guess_legacy_encoding over many samples, across processes when chardet makes it worthwhile."""
+    cpus = os.cpu_count() or 1
+    if chardet is not None and cpus > 1 and len(prefixes) >= LEGACY_POOL_MIN_FILES:
+        # No more workers than there are chunks to hand out
+        workers = min(cpus, math.ceil(len(prefixes) / LEGACY_POOL_CHUNK_SIZE))
+        try:
+            # chardet is pure Python and holds the GIL, so threads would not help;
+            # spawned workers also keep the Tk process from being forked
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                return list(pool.map(guess_legacy_encoding, prefixes, chunksize=LEGACY_POOL_CHUNK_SIZE))
+        except Exception as e:
+            print(f"Falling back to in-process encoding detection: {e}")
+    return [guess_legacy_encoding(prefix) for prefix in prefixes]
+
+def _bulk_classify(paths, include_exts):
+    """Probes many files for binary content concurrently and caches the results.
+
+    Results already in the cache are reused; call _classify_cache.clear() first to re-read the disk.
+    """
+    # Files the extension filter rejects never need their content probed
+    to_probe = [
+        p for p in paths
+        if p not in _classify_cache and (not include_exts or file_ext(p) in include_exts)
+    ]
+    if not to_probe:
+        return
+    # The probes are dominated by open/read syscalls, which release the GIL
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        started = list(pool.map(_start_classify, to_probe))
     
-    _, ext = os.path.splitext(file_path.lower())
-    return ext in INCLUDE_EXTENSIONS
+    pending = []
+    for file_path, (result, rest) in zip(to_probe, started):
+        if result is None:
+            pending.append((file_path, rest))
+        else:
+            _classify_cache[file_path] = result
+    if not pending:
+        return
+    
+    # Only samples that failed UTF-8 reach the CPU-bound encoding guess
+    encodings = _guess_legacy_encodings([prefix for _, (_, prefix) in pending])
+    for (file_path, rest), encoding in zip(pending, encodings):
+        _classify_cache[file_path] = _finish_classify(file_path, rest, encoding)
+
+def is_binary_file(file_path):
+    """Check if a file is likely to be binary."""
+    return _classify(file_path)[1]
+
+def is_regular_file(file):
+    """Checks that a path or os.DirEntry is a regular file, so FIFOs and devices are never opened.
+
+    An os.DirEntry's cached file type saves a stat call.
+    """
+    if isinstance(file, os.DirEntry):
+        try:
+            return file.is_file()
+        except OSError:
+            return False
+    return os.path.isfile(file)
+
+def passes_filters(file_path, include_exts):
+    """Applies the extension filter and binary check to a path known to be a regular file."""
+    # If include_exts is empty, include all non-binary files
+    if include_exts and file_ext(file_path) not in include_exts:
+        return False
+    
+    return not is_binary_file(file_path)
 
 def create_separator(file_path):
     """Creates a formatted separator string for a given file path."""
-    _, ext = os.path.splitext(file_path.lower())
-    comment_style = COMMENT_MAP.get(ext, '#')  # Default to # if extension not found
-    separator_text = f" File: {file_path} "
-    line_length = 80
+    return format_separator(file_path, _SEPARATOR_TEMPLATES.get(file_ext(file_path), _DEFAULT_SEPARATOR))
 
-    try:
-        if isinstance(comment_style, tuple):
-            start, end = comment_style
-            padding = start[0] * max(0, line_length - len(separator_text) - len(start) - len(end))
-            return f"\n{start}{separator_text}{padding}{end}\n\n"
-        elif isinstance(comment_style, str):
-            border = comment_style * line_length
-            centered_text = f"{comment_style} {separator_text} {comment_style}"
-            return f"\n{border}\n{centered_text}\n{border}\n\n"
-        else:
-            border = "=" * line_length
-            return f"\n{border}\n=== {file_path.center(line_length - 8)} ===\n{border}\n\n"
-    except Exception:
-        # Fallback separator
-        border = "=" * line_length
-        return f"\n{border}\n=== {file_path} ===\n{border}\n\n"
+def scan_root(path):
+    """Lists the subdirectories and candidate files of the root path in a single directory read.
 
-def get_subdirectories(path, ignore_dirs):
-    """Finds all immediate subdirectories in the given path, excluding ignored ones."""
-    dirs = []
+    Returns sorted (subdirs, files) name lists, skipping hidden entries, this script and common OS files.
+    """
+    script_name = os.path.basename(__file__)
+    ignore_files = {script_name, 'combine_core.py', '.DS_Store', 'Thumbs.db', 'desktop.ini'}
+    dirs, files = [], []
+    
     try:
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
-            if os.path.isdir(item_path) and item not in ignore_dirs and not item.startswith('.'):
-                dirs.append(item)
+        # DirEntry carries the file type from the directory listing itself,
+        # so classifying an entry does not need a stat call of its own
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                    elif entry.is_file() and entry.name not in ignore_files:
+                        files.append(entry.name)
+                except OSError:
+                    continue  # Skip entries that vanish or can't be inspected
     except PermissionError:
         pass  # Skip directories we can't access
     except Exception as e:
-        print(f"Error getting subdirectories: {e}")
-    
-    return sorted(dirs)
-
-def get_root_files(path):
-    """Finds all files in the root path, excluding this script and other common files."""
-    files = []
-    script_name = os.path.basename(__file__)
-    ignore_files = {script_name, '.DS_Store', 'Thumbs.db', 'desktop.ini'}
+        print(f"Error scanning {path}: {e}")
     
+    return sorted(dirs), sorted(files)
+
+def list_root_candidates(path):
+    """Lists the regular files in the root path, excluding this script and other common files."""
+    return scan_root(path)[1]
+
+def get_root_files(path, include_exts, candidates=None):
+    """Finds all files in the root path that pass the extension and binary filters.
+
+    `candidates` may hold an earlier list_root_candidates(path) result to avoid listing the directory again.
+    """
+    if candidates is None:
+        candidates = list_root_candidates(path)
+    # Plain concatenation; for the working directory itself the bare names
+    # match the paths run_combination later uses for the same files
+    prefix = '' if path == '.' else path.rstrip(os.sep) + os.sep
+    item_paths = [prefix + item for item in candidates]
+    _bulk_classify(item_paths, include_exts)
+    return [item for item, item_path in zip(candidates, item_paths) if passes_filters(item_path, include_exts)]
+
+def _read_chunks(f, size=None):
+    """Yields raw chunks from the current position up to byte offset `size`, or to EOF if None."""
+    if size is None:
+        yield from iter(lambda: f.read(STREAM_CHUNK_SIZE), b'')
+        return
+    remaining = size - f.tell()
+    while remaining > 0:
+        chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+def open_file_safely(file_path, encoding=None, size=None):
+    """Streams a file's content as UTF-8 encoded chunks, detecting its encoding if not given.
+
+    With `size`, reading stops there even if the file has grown since it was measured.
+    """
     try:
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
-            if (os.path.isfile(item_path) and 
-                item not in ignore_files and 
-                not item.startswith('.') and 
-                should_include_file(item_path)):
-                files.append(item)
-    except PermissionError:
-        pass  # Skip files we can't access
+        f = open(file_path, 'rb')
     except Exception as e:
-        print(f"Error getting root files: {e}")
-    
-    return sorted(files)
+        print(f"Failed to read {file_path}: {e}")
+        yield f"[ERROR: Could not read file {file_path}: {str(e)}]\n".encode('utf-8')
+        return
 
-def read_file_safely(file_path):
-    """Safely read a file with multiple encoding attempts."""
-    encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
-    
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-                return content, encoding
-        except UnicodeDecodeError:
+    with f:
+        if encoding is None:
+            encoding = detect_encoding(f.read(SAMPLE_SIZE))
+            f.seek(0)
+        
+        if encoding in ('utf-8', 'utf-8-sig'):
+            if encoding == 'utf-8-sig':
+                f.seek(len(codecs.BOM_UTF8))
+            # Already UTF-8: copy the bytes through without decoding them
+            yield from _read_chunks(f, size)
+            return
+        
+        # Anything past the sample that is not valid in the detected encoding
+        # is replaced rather than aborting the whole file.
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        for chunk in _read_chunks(f, size):
+            yield decoder.decode(chunk).encode('utf-8')
+        yield decoder.decode(b'', final=True).encode('utf-8')
+
+def read_file_safely(file_path, encoding=None, size=None):
+    """Reads a whole file as UTF-8 bytes, converted the same way open_file_safely streams it."""
+    return b''.join(open_file_safely(file_path, encoding, size))
+
+def _disjoint_selection(selected_items):
+    """Drops duplicate items, directories nested in other selected ones, and files they already cover."""
+    # Sorting by path components keeps each directory's descendants right after it
+    # ('a', 'a/b', 'a-b'), so one sweep comparing against the last kept one suffices
+    dir_names = sorted({name for kind, name in selected_items if kind == ITEM_DIR}, key=lambda p: p.split(os.sep))
+    kept_dirs = set()
+    last_kept = None
+    for name in dir_names:
+        if last_kept is None or not name.startswith(last_kept + os.sep):
+            kept_dirs.add(name)
+            last_kept = name
+
+    def covered(file_name):
+        parent = os.path.dirname(file_name)
+        while parent:
+            if parent in kept_dirs:
+                return True
+            parent = os.path.dirname(parent)
+        return False
+
+    result = []
+    seen = set()
+    for item in selected_items:
+        kind, name = item
+        if item in seen:
             continue
-        except Exception as e:
-            print(f"Error reading {file_path} with {encoding}: {e}")
+        seen.add(item)
+        if (kind == ITEM_DIR and name not in kept_dirs) or (kind == ITEM_FILE and covered(name)):
             continue
-    
-    # If all encodings fail, try reading as binary and decode with errors='replace'
+        result.append(item)
+    return result
+
+def _file_size(file):
+    """Returns the size of a path or os.DirEntry in bytes, or 0 if it can't be read."""
     try:
-        with open(file_path, 'rb') as f:
-            content = f.read().decode('utf-8', errors='replace')
-            return content, 'utf-8 (with errors)'
-    except Exception as e:
-        print(f"Failed to read {file_path}: {e}")
-        return f"[ERROR: Could not read file {file_path}: {str(e)}]\n", 'error'
+        return file.stat().st_size if isinstance(file, os.DirEntry) else os.path.getsize(file)
+    except OSError:
+        return 0
+
+def _is_file_at(file, target_stat):
+    """Returns whether a path or os.DirEntry refers to the file that target_stat describes."""
+    try:
+        st = file.stat() if isinstance(file, os.DirEntry) else os.stat(file)
+    except OSError:
+        return False
+    return os.path.samestat(st, target_stat)
+
+def _preallocate(f, size):
+    """Reserves disk space for an output file up front, where the platform supports it."""
+    if not hasattr(os, 'posix_fallocate') or size <= 0:
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError:
+        pass  # Not every filesystem supports it; writing works the same either way
+
+def _prefetch(file_path, size):
+    """Reads a small file in full, or returns None if it should be streamed instead."""
+    if size > PREFETCH_MAX_BYTES:
+        return None
+    # The encoding was already detected from the sample read by _classify
+    return read_file_safely(file_path, _classify(file_path)[2], size)
+
+def _read_ahead(files):
+    """Yields (path, size, future) in order for (path, size) pairs while reads run ahead on a thread pool."""
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+        pending = collections.deque()
+        for path, size in files:
+            pending.append((path, size, pool.submit(_prefetch, path, size)))
+            # Bound the window so memory use stays capped on huge selections
+            if len(pending) >= READ_AHEAD:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
 
 # --- GUI Application Class ---
 
@@ -198,6 +570,13 @@ class CodeAmalgamatorApp:
         self.root.geometry("600x700")
         self.root.minsize(500, 500)
         
+        # Last root directory scan, keyed by (cwd, directory mtime)
+        self._scan_cache = {}
+        # (kind, name) of each listbox row, in display order
+        self._items = []
+        # Extensions to include, as last applied by populate_list (empty means all)
+        self.include_exts = frozenset(INCLUDE_EXTENSIONS)
+        
         self.setup_styles()
         self.create_widgets()
         self.populate_list()
@@ -303,25 +682,35 @@ class CodeAmalgamatorApp:
     def get_extension_set(self):
         """Reads the extension entry and returns a set of extensions."""
         extensions = {ext.strip().lower() for ext in self.extensions_var.get().split(',') if ext.strip()}
-        # Ensure extensions start with a dot
-        return {ext if ext.startswith('.') else f'.{ext}' for ext in extensions}
+        # Ensure extensions start with a dot; interned since they are looked up once per file
+        return {sys.intern(ext if ext.startswith('.') else f'.{ext}') for ext in extensions}
 
     def populate_list(self):
         """Scans for and lists the directories and files in the unified listbox."""
         self.item_listbox.config(state=tk.NORMAL)
         self.item_listbox.delete(0, tk.END)
+        self._items = []
         
         try:
-            ignore_set = self.get_ignore_set()
+            ignore_re = compile_ignore_pattern(self.get_ignore_set())
             
-            # Update global INCLUDE_EXTENSIONS if specified
-            extension_set = self.get_extension_set()
-            if extension_set:
-                global INCLUDE_EXTENSIONS
-                INCLUDE_EXTENSIONS = list(extension_set)
+            # Replaced rather than mutated, so a combine running in the
+            # background keeps the filter it started with
+            self.include_exts = frozenset(self.get_extension_set())
             
-            subdirs = get_subdirectories('.', ignore_set)
-            files = get_root_files('.')
+            # Reuse the last scan while the directory listing is unchanged, so
+            # that editing the filters re-applies them to cached results
+            # instead of listing and probing the directory again
+            scan_key = (os.getcwd(), os.stat('.').st_mtime_ns)
+            scan = self._scan_cache.get(scan_key)
+            if scan is None:
+                _classify_cache.clear()
+                scan = scan_root('.')
+                self._scan_cache = {scan_key: scan}
+            all_subdirs, root_candidates = scan
+
+            subdirs = [d for d in all_subdirs if not ignore_re.match(d)]
+            files = get_root_files('.', self.include_exts, root_candidates)
 
             if not subdirs and not files:
                 self.item_listbox.insert(tk.END, " No items found.")
@@ -329,13 +718,11 @@ class CodeAmalgamatorApp:
                 self.status_var.set("No items found")
                 return
 
-            # Add directories
-            for dirname in subdirs:
-                self.item_listbox.insert(tk.END, f" [DIR] {dirname}")
-            
-            # Add files
-            for filename in files:
-                self.item_listbox.insert(tk.END, f" [FILE] {filename}")
+            # Add directories, then files, in a single Tcl call
+            items = [(ITEM_DIR, dirname) for dirname in subdirs]
+            items.extend((ITEM_FILE, filename) for filename in files)
+            self.item_listbox.insert(tk.END, *(ITEM_LABELS[kind] + name for kind, name in items))
+            self._items = items
             
             self.status_var.set(f"Found {len(subdirs)} directories and {len(files)} files")
 
@@ -364,26 +751,30 @@ class CodeAmalgamatorApp:
                 self.root.after(0, lambda: messagebox.showwarning("No Selection", "Please select at least one item from the list."))
                 return
 
-            selected_items = [self.item_listbox.get(i) for i in selected_indices]
-            ignore_set = self.get_ignore_set()
+            selected_items = [self._items[i] for i in selected_indices if i < len(self._items)]
+            ignore_re = compile_ignore_pattern(self.get_ignore_set())
+            # Snapshot the filter so a list refresh during the run can't change it
+            include_exts = self.include_exts
 
             # Ask for output file in the main thread
             output_filepath = None
+            save_dialog_closed = threading.Event()
             def ask_save():
                 nonlocal output_filepath
-                output_filepath = filedialog.asksaveasfilename(
-                    title="Save Combined File As...",
-                    defaultextension=".txt",
-                    filetypes=[("Text Documents", "*.txt"), ("All Files", "*.*")]
-                )
+                try:
+                    output_filepath = filedialog.asksaveasfilename(
+                        title="Save Combined File As...",
+                        defaultextension=".txt",
+                        filetypes=[("Text Documents", "*.txt"), ("All Files", "*.*")]
+                    )
+                finally:
+                    save_dialog_closed.set()
 
             self.root.after(0, ask_save)
             
-            # Wait for user input (simplified approach)
-            import time
-            while output_filepath is None:
-                time.sleep(0.1)
-                self.root.update()
+            # Block this worker thread until the dialog returns; Tk is only
+            # ever driven from the main thread's mainloop
+            save_dialog_closed.wait()
 
             if not output_filepath:
                 self.root.after(0, lambda: self.status_var.set("Save cancelled."))
@@ -395,60 +786,85 @@ class CodeAmalgamatorApp:
             total_errors = 0
             error_log = []
 
-            with open(output_filepath, 'w', encoding='utf-8') as outfile:
-                # Write header
-                outfile.write("="*80 + "\n")
-                outfile.write("CODE AMALGAMATOR - COMBINED FILES\n")
-                outfile.write(f"Generated: {os.path.basename(output_filepath)}\n")
-                outfile.write("="*80 + "\n\n")
-
-                for item in selected_items:
-                    if item.startswith(" [DIR] "):
-                        dirname = item[7:]  # Remove " [DIR] " prefix
-                        self.root.after(0, lambda d=dirname: self.status_var.set(f"Processing directory: {d}"))
-                        
-                        for root, dirs, files in os.walk(dirname):
-                            # Prune the walk by removing ignored directories
-                            dirs[:] = [d for d in dirs if d not in ignore_set and not d.startswith('.')]
-                            
-                            for filename in files:
-                                file_path = os.path.join(root, filename)
-                                
-                                if not should_include_file(file_path):
-                                    continue
-                                
-                                try:
-                                    relative_path = os.path.relpath(file_path, start=os.getcwd())
-                                    outfile.write(create_separator(relative_path))
-                                    
-                                    content, encoding = read_file_safely(file_path)
-                                    outfile.write(content)
-                                    outfile.write('\n\n')
-                                    
-                                    total_files_processed += 1
-                                    
-                                except Exception as e:
-                                    error_msg = f"Error processing {file_path}: {str(e)}"
-                                    error_log.append(error_msg)
-                                    total_errors += 1
-                                    outfile.write(f"[ERROR: {error_msg}]\n\n")
-                    
-                    elif item.startswith(" [FILE] "):
-                        filename = item[8:]  # Remove " [FILE] " prefix
-                        self.root.after(0, lambda f=filename: self.status_var.set(f"Processing file: {f}"))
-                        
+            # Collect every candidate file first so that the binary probes
+            # can be issued as one batch and the output size is known
+            candidates = []
+            # Overlapping selections would otherwise be read and written twice
+            for kind, name in _disjoint_selection(selected_items):
+                if kind == ITEM_DIR:
+                    self.root.after(0, lambda d=name: self.status_var.set(f"Processing directory: {d}"))
+                    candidates.extend(walk_entries(name, ignore_re))
+                
+                elif kind == ITEM_FILE:
+                    self.root.after(0, lambda f=name: self.status_var.set(f"Processing file: {f}"))
+                    candidates.append(name)
+
+            # An earlier output saved over in place would be read back while it is written
+            try:
+                output_stat = os.stat(output_filepath)
+            except OSError:
+                output_stat = None
+            if output_stat is not None:
+                candidates = [c for c in candidates if not _is_file_at(c, output_stat)]
+
+            # Probing a FIFO or device node would block, so only regular files go further
+            files = [c for c in candidates if is_regular_file(c)]
+            _classify_cache.clear()
+            _bulk_classify([os.fspath(f) for f in files], include_exts)
+
+            # An empty include_exts set includes every non-binary file
+            included = [(os.fspath(f), _file_size(f)) for f in files if passes_filters(os.fspath(f), include_exts)]
+            # Directory walks start from names in the working directory, so
+            # every path here is already relative to it and needs no relpath
+            separators = [create_separator(file_path).encode('utf-8') for file_path, _ in included]
+
+            header = (
+                "="*80 + "\n"
+                "CODE AMALGAMATOR - COMBINED FILES\n"
+                f"Generated: {os.path.basename(output_filepath)}\n"
+                + "="*80 + "\n\n"
+            ).encode('utf-8')
+            # Re-encoded legacy text may differ slightly in size; the file is
+            # truncated to what was actually written once the run is done
+            expected_size = len(header) + sum(size + len(sep) + 2 for (_, size), sep in zip(included, separators))
+
+            with open(output_filepath, 'wb', buffering=OUTPUT_BUFFER_SIZE) as outfile:
+                _preallocate(outfile, expected_size)
+                try:
+                    outfile.write(header)
+
+                    for (file_path, size, future), separator in zip(_read_ahead(included), separators):
                         try:
-                            if should_include_file(filename):
-                                outfile.write(create_separator(filename))
-                                content, encoding = read_file_safely(filename)
-                                outfile.write(content)
-                                outfile.write('\n\n')
-                                total_files_processed += 1
+                            content = future.result()
+                            if content is None:
+                                outfile.write(separator)
+                                separator = b''  # Already written if streaming fails midway
+                                for chunk in open_file_safely(file_path, _classify(file_path)[2], size):
+                                    outfile.write(chunk)
+                                outfile.write(b'\n\n')
+                            else:
+                                # One buffer append per prefetched file
+                                outfile.write(b''.join((separator, content, b'\n\n')))
+                            
+                            total_files_processed += 1
+                            
                         except Exception as e:
-                            error_msg = f"Error processing {filename}: {str(e)}"
+                            error_msg = f"Error processing {file_path}: {str(e)}"
                             error_log.append(error_msg)
                             total_errors += 1
-                            outfile.write(f"[ERROR: {error_msg}]\n\n")
+                            outfile.write(separator + f"[ERROR: {error_msg}]\n\n".encode('utf-8'))
+
+                    # Trim the preallocated space down to what was actually written
+                    outfile.truncate()
+                except BaseException:
+                    # Flushing what is still buffered would most likely fail the same
+                    # way and mask this error, so drop it along with the partial output
+                    outfile.raw.close()
+                    try:
+                        os.remove(output_filepath)
+                    except OSError as e:
+                        print(f"Could not remove incomplete output file: {e}")
+                    raise
 
             # Show results
             if total_files_processed > 0:
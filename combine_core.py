@@ -0,0 +1,102 @@
+#
+# Code Amalgamator - Core Helpers
+#
+# Description:
+# The helpers that `combine.py` runs once for every file it visits: extension
+# splitting, binary sniffing, separator formatting and the directory walk.
+# They hold no GUI or configuration state and are fully annotated, so this
+# module can optionally be compiled to a C extension with mypyc:
+#
+#     pip install mypy
+#     python setup.py build_ext --inplace
+#
+# `combine.py` imports this module either way; when the compiled extension is
+# present next to it, Python simply picks that up instead of this file.
+#
+
+import codecs
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+# (head, tail, fill, fill_width) pieces of a file separator, see build_separator_template
+SeparatorTemplate = Tuple[str, str, str, int]
+
+# Byte order marks and their encodings; UTF-32 first since its LE BOM starts with UTF-16's
+_BOMS: Tuple[Tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Control bytes that rarely appear in text files (tab, newlines, form feed and ESC excluded)
+_NONTEXT_BYTES: bytes = bytes(range(0, 7)) + bytes(range(14, 32)).replace(b'\x1b', b'')
+
+def file_ext(file_path: str) -> str:
+    """Returns the lower-cased extension of a path, as os.path.splitext would split it."""
+    name = os.path.basename(file_path).lstrip('.')
+    _, dot, ext = name.rpartition('.')
+    return f'.{ext.lower()}' if dot else ''
+
+def bom_encoding(prefix: bytes) -> Optional[str]:
+    """Returns the encoding announced by a byte order mark, or None if there is none."""
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    return None
+
+def is_binary_prefix(prefix: bytes) -> bool:
+    """Classifies a leading chunk of file content as binary or text."""
+    if not prefix:
+        return False
+    if b'\x00' in prefix:  # Null byte indicates binary
+        return True
+    # Deleting the control bytes is a single C-level pass over the sample
+    text_bytes = len(prefix.translate(None, _NONTEXT_BYTES))
+    return text_bytes / len(prefix) < 0.7
+
+def build_separator_template(comment_style: Union[str, Tuple[str, str]], line_length: int = 80) -> SeparatorTemplate:
+    """Precomputes the (head, tail, fill, fill_width) pieces of a separator for a comment style."""
+    if isinstance(comment_style, tuple):
+        # Block comments: a single line padded out to line_length
+        start, end = comment_style
+        return f"\n{start} File: ", f"{end}\n\n", start[0], line_length - 8 - len(start) - len(end)
+    border = comment_style * line_length
+    return f"\n{border}\n{comment_style}  File: ", f" {comment_style}\n{border}\n\n", '', 0
+
+def format_separator(file_path: str, template: SeparatorTemplate) -> str:
+    """Formats the separator placed before a file's content from a prebuilt template."""
+    head, tail, fill, fill_width = template
+    # A negative repeat count yields an empty string, so no clamping is needed
+    return f"{head}{file_path} {fill * (fill_width - len(file_path))}{tail}"
+
+def compile_ignore_pattern(ignore_dirs: Iterable[str]) -> Pattern[str]:
+    """Compiles directory names to skip, plus any hidden name, into a single anchored regex."""
+    names = '|'.join(re.escape(d) for d in sorted(ignore_dirs))
+    # Use with .match(): a leading dot, or one of the names in full
+    return re.compile(rf'\.|(?:{names})\Z' if names else r'\.')
+
+def walk_entries(root: str, ignore_re: Pattern[str]) -> Iterator['os.DirEntry[str]']:
+    """Recursively yields the non-directory entries below root, pruning ignored directories."""
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return  # Skip directories we can't access, as os.walk does
+
+    subdirs: List[str] = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if not is_dir:
+            yield entry
+        elif not ignore_re.match(entry.name) and not entry.is_symlink():
+            subdirs.append(entry.path)
+
+    # Files first, then subdirectories, matching a top-down os.walk
+    for subdir in subdirs:
+        yield from walk_entries(subdir, ignore_re)
@@ -0,0 +1,19 @@
+#
+# Optional build of the compiled `combine_core` extension for combine.py.
+#
+# Usage:
+#     pip install mypy
+#     python setup.py build_ext --inplace
+#
+# combine.py runs unchanged without this step; the compiled module only
+# speeds up the per-file work when combining very large trees.
+#
+
+from setuptools import setup
+from mypyc.build import mypycify
+
+setup(
+    name="combine-core",
+    py_modules=[],
+    ext_modules=mypycify(["combine_core.py"]),
+)